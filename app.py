@@ -1,5 +1,11 @@
-from flask import Flask, jsonify, request
+import queue
+import threading
+import time
+
+from flask import Flask, Response, request
+import orjson
 import pymysql.cursors
+from werkzeug.http import generate_etag
 
 app = Flask(__name__)
 
@@ -8,49 +14,142 @@ MYSQL_HOST = 'localhost'
 MYSQL_USER = 'readonly'
 MYSQL_PASSWORD = ''
 MYSQL_DB = 'drs'
+MYSQL_SOCKET = '/var/lib/mysql/mysql.sock'
+MYSQL_POOL_SIZE = 10
+
+# Idle connections kept open between requests
+connection_pool = queue.LifoQueue(maxsize=MYSQL_POOL_SIZE)
+
+# Query results are cached since the manifest is only updated by periodic syncs.
+# Together with RESPONSE_MAX_AGE, a client behind a shared cache may see data up
+# to ten minutes older than the database. Empty results are never cached, so a
+# newly ingested dataset is visible on the next request.
+QUERY_CACHE_TTL = 300  # seconds
+QUERY_CACHE_MAX_ENTRIES = 4096
+
+query_cache = {}
+query_cache_lock = threading.Lock()
+
+# The /datasets listing is kept as encoded JSON with its ETag, so a hit skips
+# both the manifest scan and re-encoding. New datasets only arrive with a sync;
+# with RESPONSE_MAX_AGE on top, a client may see a listing up to 15 minutes old.
+DATASETS_CACHE_TTL = 600  # seconds
+
+datasets_response_cache = None
+
+DRS_URIS_QUERY = """
+SELECT drs_uri FROM files
+INNER JOIN manifest ON manifest.hubmap_id = files.hubmap_id
+WHERE manifest.hubmap_id = %s;
+"""
+
+INCLUDED_DATASETS_QUERY = """
+SELECT DISTINCT hubmap_uuid FROM manifest;
+"""
+
+# How long clients and proxies may reuse a response without revalidating, on top
+# of the time it spent in a server-side cache. Empty object lookups are sent
+# with no-cache, since the dataset may be ingested by the next sync.
+RESPONSE_MAX_AGE = 300  # seconds
 
 def connect_to_database():
+    # Co-located servers are reached over the unix socket, skipping the TCP stack
+    unix_socket = MYSQL_SOCKET if MYSQL_HOST in ('localhost', '127.0.0.1') else None
     connection = pymysql.connect(host=MYSQL_HOST,
                                  user=MYSQL_USER,
                                  password=MYSQL_PASSWORD,
                                  database=MYSQL_DB,
                                  cursorclass=pymysql.cursors.DictCursor,
-                                 unix_socket="/var/lib/mysql/mysql.sock")
+                                 autocommit=True,
+                                 unix_socket=unix_socket)
     return connection
 
+def get_connection():
+    try:
+        connection = connection_pool.get_nowait()
+    except queue.Empty:
+        return connect_to_database()
+    # Replace connections dropped by the server after wait_timeout
+    try:
+        connection.ping()
+    except pymysql.err.Error:
+        # A failed ping usually leaves the socket already closed
+        if connection.open:
+            connection.close()
+        return connect_to_database()
+    return connection
+
+def release_connection(connection):
+    try:
+        connection_pool.put_nowait(connection)
+    except queue.Full:
+        connection.close()
+
 def execute_sql_query(query, params=None):
-    connection = connect_to_database()
+    connection = get_connection()
     try:
         with connection.cursor() as cursor:
             cursor.execute(query, params)
             result = cursor.fetchall()
-    finally:
+    except Exception:
         connection.close()
+        raise
+    release_connection(connection)
     return result
 
-@app.route('/ga4gh/drs/v1/objects/<hubmap_id>')
-def get_matches():
-    hubmap_id = request.args.get('hubmap_id')
-    if not hubmap_id:
-        return jsonify({'error': 'HuBMAP ID is required to perform this operation'}), 400
+def execute_cached_query(query, params=None):
+    key = (query, params)
+    now = time.monotonic()
+    with query_cache_lock:
+        cached = query_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    result = execute_sql_query(query, params)
+    if not result:
+        return result
+    with query_cache_lock:
+        query_cache.pop(key, None)
+        if len(query_cache) >= QUERY_CACHE_MAX_ENTRIES:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            del query_cache[next(iter(query_cache))]
+        query_cache[key] = (now + QUERY_CACHE_TTL, result)
+    return result
 
-    query = """
-    SELECT drs_uri FROM files
-    INNER JOIN manifest ON manifest.hubmap_id = files.hubmap_id
-    WHERE manifest.hubmap_id = %s;
-    """
+def json_response(obj):
+    # orjson is much faster than Flask's stdlib encoder on large result sets;
+    # default=str covers datetime values returned by pymysql
+    return Response(orjson.dumps(obj, default=str), mimetype='application/json')
 
-    matches = execute_sql_query(query, (hubmap_id,))
-    return jsonify(matches)
+def cacheable(response):
+    # Keeps an ETag the caller already set instead of hashing the body again
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = RESPONSE_MAX_AGE
+    return response.make_conditional(request)
+
+@app.route('/ga4gh/drs/v1/objects/<hubmap_id>')
+def get_matches(hubmap_id):
+    matches = execute_cached_query(DRS_URIS_QUERY, (hubmap_id,))
+    response = json_response(matches)
+    if not matches:
+        response.cache_control.no_cache = True
+        return response
+    return cacheable(response)
 
 @app.route('/datasets', methods=['GET'])
 def get_included_datasets():
-    query = """
-    SELECT DISTINCT hubmap_uuid FROM manifest;
-    """
+    global datasets_response_cache
+    cached = datasets_response_cache
+    now = time.monotonic()
+    if cached is None or cached[0] <= now:
+        body = orjson.dumps(execute_sql_query(INCLUDED_DATASETS_QUERY), default=str)
+        cached = (now + DATASETS_CACHE_TTL, body, generate_etag(body))
+        datasets_response_cache = cached
 
-    matches = execute_sql_query(query)
-    return jsonify(matches)
+    response = Response(cached[1], mimetype='application/json')
+    response.set_etag(cached[2])
+    return cacheable(response)
 
 if __name__ == '__main__':
     app.run(debug=True, host="127.0.0.1")
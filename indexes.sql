@@ -0,0 +1,33 @@
+-- Indexes backing the lookups in app.py.
+-- Safe to re-run: each index is only created when no existing index,
+-- whatever its name, already leads with the same column.
+-- Apply with `mysql drs < indexes.sql`.
+
+-- /ga4gh/drs/v1/objects/<hubmap_id>
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics
+               WHERE table_schema = DATABASE() AND table_name = 'manifest'
+                 AND column_name = 'hubmap_id' AND seq_in_index = 1) = 0,
+              'CREATE INDEX idx_manifest_hubmap_id ON manifest (hubmap_id)',
+              'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics
+               WHERE table_schema = DATABASE() AND table_name = 'files'
+                 AND column_name = 'hubmap_id' AND seq_in_index = 1) = 0,
+              'CREATE INDEX idx_files_hubmap_id ON files (hubmap_id)',
+              'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- /datasets: lets SELECT DISTINCT read the index instead of the whole table
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.statistics
+               WHERE table_schema = DATABASE() AND table_name = 'manifest'
+                 AND column_name = 'hubmap_uuid' AND seq_in_index = 1) = 0,
+              'CREATE INDEX idx_manifest_hubmap_uuid ON manifest (hubmap_uuid)',
+              'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;